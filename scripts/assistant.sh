@@ -6,8 +6,9 @@ source "$(cd "$(dirname "$0")" >/dev/null 2>&1 && pwd)/env.sh"
 source .venv/bin/activate
 
 UI_DIR="$(cd "$(dirname "$0")" >/dev/null 2>&1 &&cd .. && pwd)/ui"
-VAD_SCRIPT="$(cd "$(dirname "$0")" >/dev/null 2>&1 && pwd)/vad_record.py"
 LISTEN_PID=""
+# Run entry points with -m so Python loads them from __pycache__ bytecode
+export PYTHONPATH="$(cd "$(dirname "$0")" >/dev/null 2>&1 && pwd)${PYTHONPATH:+:$PYTHONPATH}"
 
 while IFS= read -r line; do
   if [[ -z "$LISTEN_PID" && "$line" == *"Listening..."* ]]; then
@@ -15,7 +16,7 @@ while IFS= read -r line; do
        --posx=5000 --posy=100 --no-buttons --borders=0 --title="Listening..." &
     LISTEN_PID=$!
   fi
-done < <(python -u "$VAD_SCRIPT")
+done < <(python -u -m vad_record)
 
 if [[ -n "$LISTEN_PID" ]] && ps -p "$LISTEN_PID" >/dev/null 2>&1; then
   kill "$LISTEN_PID" || true
@@ -25,7 +26,13 @@ yad --html --uri="file://$UI_DIR/processing.html" \
    --posx=5000 --posy=100 --no-buttons --borders=0 --title="Processing..." &
 PROC_PID=$!
 sleep 0.2
-TEXT=$($(cd "$(dirname "$0")" >/dev/null 2>&1 &&cd .. && pwd)/scripts/stt.sh | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')
+TRANSCRIPT="$(cd "$(dirname "$0")" >/dev/null 2>&1 &&cd .. && pwd)/tmp/query.txt"
+if [[ -s "$TRANSCRIPT" ]]; then
+  # vad_record.py already transcribed the recording segment by segment
+  TEXT=$(sed 's/^[[:space:]]*//;s/[[:space:]]*$//' "$TRANSCRIPT")
+else
+  TEXT=$($(cd "$(dirname "$0")" >/dev/null 2>&1 &&cd .. && pwd)/scripts/stt.sh | sed 's/^[[:space:]]*//;s/[[:space:]]*$//')
+fi
 echo "DEBUG recognized text: <$TEXT>"
 
 if [[ -z "$TEXT" ]]; then
@@ -33,7 +40,7 @@ if [[ -z "$TEXT" ]]; then
   exit 0
 fi
 
-CMD_JSON=$(python $(cd "$(dirname "$0")" >/dev/null 2>&1 && cd .. && pwd)/scripts/commands.py --plan "$TEXT" 2>/dev/null || true)
+CMD_JSON=$(python -m commands --plan "$TEXT" 2>/dev/null || true)
 CMD_TYPE=$(printf '%s' "$CMD_JSON" | jq -r '.type // empty')
 
 SOURCE=""
@@ -85,7 +92,7 @@ else
     FALLBACK="true"
   fi
   if [[ "$FALLBACK" == "true" ]]; then
-    LIVE=$(python "$(cd "$(dirname "$0")" >/dev/null 2>&1 && cd .. && pwd)/scripts/gemini_live.py" --text "$TEXT" 2>/dev/null || true)
+    LIVE=$(python -m gemini_live --text "$TEXT" 2>/dev/null || true)
     if [[ -z "$LIVE" ]]; then
       REPLY="Sorry, I couldn't fetch live information right now."
       SOURCE="gemini"
@@ -155,9 +162,15 @@ SPEAK_TEXT=$(printf '%s' "$REPLY" \
 aplay "$(cd "$(dirname "$0")" >/dev/null 2>&1 &&cd .. && pwd)/tmp/tts_output.wav"
 
 if [[ "$CMD_TYPE" == "confirmed" ]]; then
-  CMD_ID=$(printf '%s' "$CMD_JSON" | jq -r '.id')
-  CMD_PARAMS=$(printf '%s' "$CMD_JSON" | jq -c '.params // {}')
-  python $(cd "$(dirname "$0")" >/dev/null 2>&1 && cd .. && pwd)/scripts/commands.py --exec-id "$CMD_ID" --params "$CMD_PARAMS" >/dev/null 2>&1 || true
+  CMD_STEPS=$(printf '%s' "$CMD_JSON" | jq -c '.steps // empty')
+  if [[ -n "$CMD_STEPS" ]]; then
+    # Multi-intent utterance: run every step in order
+    python -m commands --exec-steps "$CMD_STEPS" >/dev/null 2>&1 || true
+  else
+    CMD_ID=$(printf '%s' "$CMD_JSON" | jq -r '.id')
+    CMD_PARAMS=$(printf '%s' "$CMD_JSON" | jq -c '.params // {}')
+    python -m commands --exec-id "$CMD_ID" --params "$CMD_PARAMS" >/dev/null 2>&1 || true
+  fi
 fi
 
 sleep 6
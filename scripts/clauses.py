@@ -0,0 +1,93 @@
+import re
+from typing import List
+
+# Conjunctions and sequencing words that separate actions in one utterance,
+# longest first so "and then" is consumed as a single separator.
+SEQUENCE_WORDS = (
+    "and after that",
+    "and afterwards",
+    "and then",
+    "and also",
+    "after that",
+    "afterwards",
+    "and",
+    "then",
+    "also",
+    "plus",
+    "finally",
+)
+
+# Words that make a clause an action on their own. A later clause with none
+# of them ("... and brightness to 30") borrows the previous clause's verb.
+VERBS = {
+    "set", "turn", "switch", "put", "make", "increase", "decrease", "raise",
+    "lower", "reduce", "boost", "dim", "brighten", "mute", "unmute", "silence",
+    "lock", "shut", "power", "reboot", "restart", "suspend", "sleep", "enable",
+    "disable", "connect", "disconnect", "update", "upgrade", "apply", "check",
+    "open", "close", "start", "stop", "play", "pause",
+}
+PARTICLES = {"up", "down", "on", "off"}
+FILLERS = {"please", "thanks", "thank", "you", "okay", "ok", "now", "first", "hey", "bumblebee"}
+
+_SPLIT_RE = re.compile(
+    r"\s*[,;.]?\s*\b(?:" + "|".join(w.replace(" ", r"\s+") for w in SEQUENCE_WORDS) + r")\b\s*"
+    r"|\s*[;.]\s+|\s*,\s*",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"[\w%']+")
+
+
+def _strip_fillers(clause: str) -> str:
+    words = clause.split()
+    while words and words[0].lower().strip(",.!?") in FILLERS:
+        words.pop(0)
+    while words and words[-1].lower().strip(",.!?") in FILLERS:
+        words.pop()
+    return " ".join(words).strip(" ,;.!?")
+
+
+def _has_verb(clause: str) -> bool:
+    return any(w in VERBS or w in PARTICLES for w in _WORD_RE.findall(clause.lower()))
+
+
+def _with_verb(clause: str, previous: str) -> str:
+    """
+    Give a verbless clause the verb of the clause before it:
+    ("set volume to 50 percent", "brightness to 30") -> "set brightness to 30"
+    ("turn up the volume", "brightness") -> "turn up brightness"
+    ("turn the volume up", "brightness") -> "turn brightness up"
+    """
+    words = previous.split()
+    lead = []
+    for w in words:
+        lw = w.lower()
+        if lead and lw not in PARTICLES:
+            break
+        if not lead and lw not in VERBS:
+            break
+        lead.append(w)
+    if not lead:
+        return clause
+    tail = []
+    if len(lead) == 1 and len(words) > 1 and words[-1].lower() in PARTICLES:
+        tail = [words[-1]]
+    return " ".join(lead + [clause] + tail)
+
+
+def split_clauses(text: str) -> List[str]:
+    """
+    Split an utterance into action clauses:
+    "mute the volume and then lock the screen" -> ["mute the volume", "lock the screen"]
+    Filler-only pieces ("..., please") are dropped and verbless clauses reuse
+    the previous verb. A single-action utterance comes back as a one-element
+    list.
+    """
+    parts = []
+    for p in _SPLIT_RE.split(text):
+        p = _strip_fillers(p.strip(" ,;."))
+        if not p:
+            continue
+        if parts and not _has_verb(p):
+            p = _with_verb(p, parts[-1])
+        parts.append(p)
+    return parts or [text.strip()]
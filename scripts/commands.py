@@ -1,23 +1,33 @@
 #!/usr/bin/env python3
 import json
 import os
-import shlex
 import subprocess
 import sys
+import time
 from pathlib import Path
 
-from embeddings import embed_text, load_or_build_cache, EmbeddingError
-from matcher import rank_matches
-from param_parser import extract_params
+# embeddings/matcher/param_parser are imported inside plan_from_text so the
+# --exec-id path does not pay for urllib/http.client at startup.
 
 ROOT = Path(__file__).resolve().parent.parent
 SCRIPTS = ROOT / "scripts"
 REGISTRY_PATH = SCRIPTS / "commands.json"
 CACHE_PATH = SCRIPTS / "commands_cache.json"
 
-DEFAULT_THRESHOLD = float(os.getenv("CMD_MATCH_THRESHOLD", "0.75"))
-CLARIFY_THRESHOLD = float(os.getenv("CMD_CLARIFY_THRESHOLD", "0.60"))
+
+def _env_float(name: str) -> float | None:
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return None
+
+
+# When unset, thresholds come from the embedding backend (gemini: 0.75 / 0.60)
+DEFAULT_THRESHOLD = _env_float("CMD_MATCH_THRESHOLD")
+CLARIFY_THRESHOLD = _env_float("CMD_CLARIFY_THRESHOLD")
 AMBIGUITY_DELTA = float(os.getenv("CMD_AMBIGUITY_DELTA", "0.05"))
+BATCH_SIZE = int(os.getenv("CMD_BATCH_SIZE", "100"))
+BATCH_WORKERS = int(os.getenv("CMD_BATCH_WORKERS", "4"))
 
 
 def _yad_confirm(text: str) -> bool:
@@ -145,45 +155,78 @@ def _spoken_for(cmd_id: str, desc: str, params: dict | None, success: bool, exit
     return desc
 
 
-def plan_from_text(text: str, threshold: float = DEFAULT_THRESHOLD) -> dict:
-    if not REGISTRY_PATH.exists():
-        return {"type": "error", "message": f"Registry not found: {REGISTRY_PATH}"}
-    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
-        registry = json.load(f)
+def _candidates(ranked: list) -> list:
+    """Top match plus up to two runners-up within AMBIGUITY_DELTA of it."""
+    top_score = ranked[0][1]
+    candidates = [ranked[0]]
+    for item in ranked[1:3]:
+        if abs(item[1] - top_score) <= AMBIGUITY_DELTA:
+            candidates.append(item)
+    return candidates
+
+
+def _thresholds(backend, threshold: float | None = None) -> tuple:
+    """(match, clarify) thresholds: explicit argument, then env, then backend default."""
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD if DEFAULT_THRESHOLD is not None else backend.match_threshold
+    clarify = CLARIFY_THRESHOLD if CLARIFY_THRESHOLD is not None else backend.clarify_threshold
+    return threshold, clarify
+
+
+def _resolve(text: str, qvec: list, ranked: list, threshold: float, clarify: float, memory: dict) -> dict:
+    """
+    Apply the ambiguity, threshold and dangerous-command rules to one utterance
+    (or clause), opening YAD dialogs where needed. Returns a confirmed,
+    cancelled or no_match plan. Answers are recorded in `memory`; the caller
+    saves it.
+    """
+    from param_parser import extract_params
+    from resolutions import recall, refresh, remember, apply_priors
 
-    try:
-        cache = load_or_build_cache(registry, str(CACHE_PATH))
-        qvec = embed_text(text)
-    except EmbeddingError as e:
-        return {"type": "error", "message": str(e)}
-    ranked = rank_matches(qvec, registry, cache)
     if not ranked:
         return {"type": "no_match", "score": 0.0}
 
+    # Past clarification answers: boost confirmed commands, skip repeat dialogs
+    ranked = apply_priors(memory, ranked)
     top_cmd, top_score, _matched = ranked[0]
+    remembered = None
+    asked = False
 
     # Ambiguity: ask if close scores
-    candidates = [ranked[0]]
-    for item in ranked[1:3]:
-        if abs(item[1] - top_score) <= AMBIGUITY_DELTA:
-            candidates.append(item)
-    if len(candidates) > 1 and top_score >= CLARIFY_THRESHOLD:
-        opts = [c[0]["description"] for c in candidates]
-        sel = _yad_choose(opts)
-        if not sel:
-            return {"type": "cancelled"}
-        for c in candidates:
-            if c[0]["description"] == sel:
-                top_cmd, top_score, _matched = c
-                break
+    candidates = _candidates(ranked)
+    if len(candidates) > 1 and top_score >= clarify:
+        remembered = recall(memory, text, qvec, [c[0]["id"] for c in candidates])
+        if remembered:
+            for c in candidates:
+                if c[0]["id"] == remembered:
+                    top_cmd, top_score, _matched = c
+                    break
+        else:
+            opts = [c[0]["description"] for c in candidates]
+            sel = _yad_choose(opts)
+            if not sel:
+                return {"type": "cancelled"}
+            asked = True
+            for c in candidates:
+                if c[0]["description"] == sel:
+                    top_cmd, top_score, _matched = c
+                    break
 
     # Threshold rules
-    if top_score < CLARIFY_THRESHOLD:
+    if top_score < clarify:
         return {"type": "no_match", "score": top_score}
-    if CLARIFY_THRESHOLD <= top_score < threshold:
-        ok = _yad_confirm(f"Did you mean: {top_cmd['description']}?")
-        if not ok:
-            return {"type": "cancelled"}
+    if clarify <= top_score < threshold:
+        remembered = remembered or recall(memory, text, qvec, [top_cmd["id"]])
+        if not remembered:
+            ok = _yad_confirm(f"Did you mean: {top_cmd['description']}?")
+            if not ok:
+                return {"type": "cancelled"}
+            asked = True
+
+    if asked:
+        remember(memory, text, qvec, top_cmd["id"])
+    elif remembered:
+        refresh(memory, text, qvec, top_cmd["id"])
 
     # Dangerous confirm
     if top_cmd.get("dangerous", False):
@@ -211,6 +254,309 @@ def plan_from_text(text: str, threshold: float = DEFAULT_THRESHOLD) -> dict:
     }
 
 
+def _plan_steps(clauses: list, qvecs: list, registry: list, cache: dict, threshold: float, clarify: float, memory: dict) -> dict | None:
+    """
+    Plan each clause of a multi-intent utterance. Returns None, before any
+    dialog opens, if some clause matches nothing or every clause lands on the
+    same command; the caller then plans the utterance as a whole. Clauses that
+    repeat an earlier clause's command are dropped, so a command never runs
+    (or asks for confirmation) twice.
+    """
+    from matcher import rank_matches
+    from resolutions import apply_priors
+
+    all_ranked = [rank_matches(v, registry, cache) for v in qvecs]
+    tops = []
+    for ranked in all_ranked:
+        boosted = apply_priors(memory, ranked)
+        if not boosted or boosted[0][1] < clarify:
+            return None
+        tops.append(boosted[0][0]["id"])
+    if len(set(tops)) == 1:
+        return None
+
+    steps = []
+    planned = set()
+    seen = set()
+    for clause, qvec, ranked, top_id in zip(clauses, qvecs, all_ranked, tops):
+        # Drop the clause rather than re-ranking it: its runner-up may be the
+        # opposite command (brightness_up -> brightness_down)
+        if top_id in seen or top_id in planned:
+            continue
+        seen.add(top_id)
+        plan = _resolve(clause, qvec, ranked, threshold, clarify, memory)
+        # A cancelled step, or one resolving to an already planned command
+        # (via a dialog or recall), is dropped; the remaining steps still run
+        if plan["type"] == "confirmed" and plan["id"] not in planned:
+            plan["text"] = clause
+            planned.add(plan["id"])
+            steps.append(plan)
+    if not steps:
+        return {"type": "cancelled"}
+    if len(steps) == 1:
+        return steps[0]
+    return {
+        "type": "confirmed",
+        "description": "; ".join(st["description"] for st in steps),
+        "score": min(st["score"] for st in steps),
+        "spoken": " ".join(st["spoken"] for st in steps),
+        "steps": steps,
+    }
+
+
+def plan_from_text(text: str, threshold: float | None = None, backend: str | None = None) -> dict:
+    """
+    Plan an utterance. "Mute the volume and lock the screen" is split into
+    clauses that are embedded in one batched request and returned as an
+    ordered multi-step plan ("steps") with one combined "spoken" line.
+    """
+    from clauses import split_clauses
+    from embeddings import get_backend, load_or_build_cache, EmbeddingError
+    from matcher import rank_matches
+    from resolutions import load_memory, save_memory
+
+    if not REGISTRY_PATH.exists():
+        return {"type": "error", "message": f"Registry not found: {REGISTRY_PATH}"}
+    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+        registry = json.load(f)
+
+    clauses = split_clauses(text)
+    try:
+        embedder = get_backend(backend)
+        cache = load_or_build_cache(registry, str(CACHE_PATH), embedder)
+        if len(clauses) > 1:
+            # Clauses and the whole utterance in a single round trip
+            qvecs = embedder.embed_texts(clauses + [text])
+        else:
+            qvecs = [embedder.embed_text(text)]
+    except EmbeddingError as e:
+        return {"type": "error", "message": str(e)}
+    threshold, clarify = _thresholds(embedder, threshold)
+
+    memory = load_memory()
+    result = None
+    if len(clauses) > 1:
+        result = _plan_steps(clauses, qvecs[:-1], registry, cache, threshold, clarify, memory)
+    if result is None:
+        qvec = qvecs[-1]
+        result = _resolve(text, qvec, rank_matches(qvec, registry, cache), threshold, clarify, memory)
+    if memory.get("changed"):
+        try:
+            save_memory(memory)
+        except OSError:
+            pass
+    return result
+
+
+def _decide(ranked: list, threshold: float, clarify: float) -> tuple:
+    """
+    Non-interactive version of the plan_from_text rules. Returns
+    (type, top, candidates) where type is no_match, ambiguous (a choice
+    dialog would open), clarify (a "Did you mean" dialog would open) or
+    confirmed.
+    """
+    if not ranked:
+        return "no_match", None, []
+    top = ranked[0]
+    candidates = _candidates(ranked)
+    if top[1] < clarify:
+        return "no_match", top, candidates
+    if len(candidates) > 1:
+        return "ambiguous", top, candidates
+    if top[1] < threshold:
+        return "clarify", top, candidates
+    return "confirmed", top, candidates
+
+
+def _read_batch_items(source: str) -> tuple:
+    """
+    Read JSONL utterances from a file or stdin ("-"). Each line is either a
+    JSON string or an object with "text" and optionally "expected" (a command
+    id, or null when no command should match). Malformed lines are skipped
+    and reported on stderr with their line number.
+
+    Returns (items, skipped_count).
+    """
+    f = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    items = []
+    skipped = 0
+    try:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                obj = None
+                reason = f"invalid JSON ({e})"
+            else:
+                reason = 'expected a string or an object with a "text" string'
+            if isinstance(obj, str):
+                obj = {"text": obj}
+            if not isinstance(obj, dict) or not isinstance(obj.get("text"), str):
+                # Skip it; stdout carries only plans
+                print(json.dumps({"type": "skipped", "line": lineno, "message": reason}), file=sys.stderr)
+                skipped += 1
+                continue
+            items.append(obj)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return items, skipped
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[int(round(p * (len(values) - 1)))]
+
+
+def plan_batch(
+    items: list,
+    threshold: float | None = None,
+    batch_size: int = BATCH_SIZE,
+    workers: int = BATCH_WORKERS,
+    backend: str | None = None,
+) -> tuple:
+    """
+    Plan many utterances without YAD dialogs. Utterances are embedded in
+    batches of batch_size with up to `workers` requests in flight, then all
+    scored against the registry in one pass.
+
+    Returns (plans, summary). Each plan's latency_ms is its batch's embedding
+    time plus its share of the scoring time.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from embeddings import get_backend, load_or_build_cache, EmbeddingError
+    from matcher import rank_matches_many
+    from param_parser import extract_params
+
+    if not REGISTRY_PATH.exists():
+        raise EmbeddingError(f"Registry not found: {REGISTRY_PATH}")
+    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+        registry = json.load(f)
+
+    embedder = get_backend(backend)
+    threshold, clarify = _thresholds(embedder, threshold)
+    t_start = time.perf_counter()
+    cache = load_or_build_cache(registry, str(CACHE_PATH), embedder)
+
+    texts = [it["text"] for it in items]
+    chunks = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    def embed_chunk(chunk):
+        t0 = time.perf_counter()
+        vecs = embedder.embed_texts(chunk)
+        return vecs, (time.perf_counter() - t0) * 1000
+
+    qvecs = []
+    item_embed_ms = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        for vecs, ms in ex.map(embed_chunk, chunks):
+            qvecs.extend(vecs)
+            item_embed_ms.extend([ms] * len(vecs))
+
+    t0 = time.perf_counter()
+    all_ranked = rank_matches_many(qvecs, registry, cache)
+    score_ms = (time.perf_counter() - t0) * 1000 / max(1, len(items))
+
+    plans = []
+    counts = {"confirmed": 0, "ambiguous": 0, "clarify": 0, "no_match": 0}
+    labelled = correct = top1_correct = silent_errors = 0
+    latencies = []
+    for it, ranked, embed_ms in zip(items, all_ranked, item_embed_ms):
+        kind, top, candidates = _decide(ranked, threshold, clarify)
+        counts[kind] += 1
+        latency = embed_ms + score_ms
+        latencies.append(latency)
+        predicted = top[0]["id"] if top and kind != "no_match" else None
+        plan = {
+            "text": it["text"],
+            "backend": embedder.name,
+            "type": kind,
+            "id": predicted,
+            "score": round(top[1], 4) if top else 0.0,
+            "candidates": [{"id": c[0]["id"], "score": round(c[1], 4)} for c in candidates],
+            "params": extract_params(predicted, it["text"]) if predicted else {},
+            "latency_ms": round(latency, 2),
+        }
+        if "expected" in it:
+            labelled += 1
+            plan["expected"] = it["expected"]
+            plan["correct"] = predicted == it["expected"]
+            correct += plan["correct"]
+            # Wrong command that would run without any dialog
+            silent_errors += kind == "confirmed" and not plan["correct"]
+            top1_correct += bool(top) and top[0]["id"] == it["expected"]
+        plans.append(plan)
+
+    n = len(items)
+    wall_ms = (time.perf_counter() - t_start) * 1000
+    summary = {
+        "type": "summary",
+        "backend": embedder.name,
+        "count": n,
+        "labelled": labelled,
+        "accuracy": round(correct / labelled, 4) if labelled else None,
+        "top1_accuracy": round(top1_correct / labelled, 4) if labelled else None,
+        "silent_error_rate": round(silent_errors / labelled, 4) if labelled else None,
+        "ambiguity_rate": round(counts["ambiguous"] / n, 4) if n else 0.0,
+        "clarify_rate": round(counts["clarify"] / n, 4) if n else 0.0,
+        "no_match_rate": round(counts["no_match"] / n, 4) if n else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50), 2),
+            "p95": round(_percentile(latencies, 0.95), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "embed_requests": len(chunks),
+        "wall_ms": round(wall_ms, 1),
+        "utterances_per_s": round(n / (wall_ms / 1000), 1) if wall_ms > 0 else 0.0,
+    }
+    return plans, summary
+
+
+def _run_plan_batch(
+    source: str,
+    out_path: str | None,
+    threshold: float | None,
+    batch_size: int,
+    workers: int,
+    backends: list,
+) -> int:
+    """Plan the corpus once per backend; one summary line per backend."""
+    from embeddings import EmbeddingError
+
+    try:
+        items, skipped = _read_batch_items(source)
+    except (OSError, ValueError) as e:
+        print(json.dumps({"type": "error", "message": str(e)}), file=sys.stderr)
+        return 1
+    runs = []
+    failed = False
+    for b in backends:
+        try:
+            runs.append(plan_batch(items, threshold, batch_size, workers, b))
+        except EmbeddingError as e:
+            # Keep going so an offline run can still evaluate the local backend
+            runs.append(([], {"type": "error", "backend": b, "message": str(e)}))
+            failed = True
+    out = sys.stdout if out_path is None else open(out_path, "w", encoding="utf-8")
+    try:
+        for plans, _summary in runs:
+            for plan in plans:
+                out.write(json.dumps(plan) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    for _plans, summary in runs:
+        if summary.get("type") == "summary":
+            summary["skipped_lines"] = skipped
+        print(json.dumps(summary), file=sys.stderr)
+    return 1 if failed else 0
+
+
 def _format_command(template: str, params: dict) -> str:
     # Only permit integer substitutions for value/delta
     safe = {}
@@ -226,11 +572,12 @@ def _format_command(template: str, params: dict) -> str:
         return template
 
 
-def exec_by_id(cmd_id: str, params: dict | None = None) -> dict:
-    if not REGISTRY_PATH.exists():
-        return {"type": "error", "message": f"Registry not found: {REGISTRY_PATH}"}
-    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
-        registry = json.load(f)
+def exec_by_id(cmd_id: str, params: dict | None = None, registry: list | None = None) -> dict:
+    if registry is None:
+        if not REGISTRY_PATH.exists():
+            return {"type": "error", "message": f"Registry not found: {REGISTRY_PATH}"}
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            registry = json.load(f)
     target = None
     for c in registry:
         if c.get("id") == cmd_id:
@@ -271,21 +618,86 @@ def exec_by_id(cmd_id: str, params: dict | None = None) -> dict:
         }
 
 
+def exec_plan(steps: list) -> dict:
+    """
+    Run the steps of a multi-step plan in order with exec_by_id, stopping at
+    the first step that fails. "spoken" combines the steps that ran.
+    """
+    if not REGISTRY_PATH.exists():
+        return {"type": "error", "message": f"Registry not found: {REGISTRY_PATH}"}
+    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+        registry = json.load(f)
+    results = []
+    for step in steps:
+        if not isinstance(step, dict) or not step.get("id"):
+            continue
+        r = exec_by_id(step["id"], step.get("params") or {}, registry)
+        results.append(r)
+        if r.get("type") == "error" or r.get("exit_code", 0) != 0:
+            break
+    failed = any(r.get("type") == "error" for r in results)
+    return {
+        "type": "error" if failed else "executed",
+        "steps": results,
+        "spoken": " ".join(r.get("spoken") or r.get("message", "") for r in results),
+    }
+
+
 def main(argv):
+    if "--profile-startup" in argv:
+        from startup import profile_startup
+
+        return profile_startup("commands", [a for a in argv if a != "--profile-startup"])
 
     text = None
-    thr = DEFAULT_THRESHOLD
+    thr = None
+    backend = None
     exec_id = None
     params_json = None
+    steps_json = None
+    batch_source = None
+    batch_out = None
+    batch_size = BATCH_SIZE
+    workers = BATCH_WORKERS
     i = 0
     while i < len(argv):
         a = argv[i]
         if a == "--plan" and i + 1 < len(argv):
             text = argv[i + 1]
             i += 2
+        elif a == "--plan-batch":
+            # Optional path; stdin when omitted or "-"
+            if i + 1 < len(argv) and not argv[i + 1].startswith("--"):
+                batch_source = argv[i + 1]
+                i += 2
+            else:
+                batch_source = "-"
+                i += 1
+        elif a == "--backend" and i + 1 < len(argv):
+            # --plan-batch accepts a comma-separated list to compare backends
+            backend = argv[i + 1]
+            i += 2
+        elif a == "--out" and i + 1 < len(argv):
+            batch_out = argv[i + 1]
+            i += 2
+        elif a == "--batch-size" and i + 1 < len(argv):
+            try:
+                batch_size = max(1, int(argv[i + 1]))
+            except Exception:
+                pass
+            i += 2
+        elif a == "--workers" and i + 1 < len(argv):
+            try:
+                workers = max(1, int(argv[i + 1]))
+            except Exception:
+                pass
+            i += 2
         elif a == "--exec-id" and i + 1 < len(argv):
             exec_id = argv[i + 1]
             i += 2
+        elif a == "--exec-steps" and i + 1 < len(argv):
+            steps_json = argv[i + 1]
+            i += 2
         elif a == "--params" and i + 1 < len(argv):
             params_json = argv[i + 1]
             i += 2
@@ -298,6 +710,18 @@ def main(argv):
         else:
             i += 1
 
+    if steps_json:
+        try:
+            steps = json.loads(steps_json)
+        except Exception:
+            steps = None
+        if not isinstance(steps, list):
+            print(json.dumps({"type": "error", "message": "--exec-steps expects a JSON list of steps"}))
+            return 1
+        result = exec_plan(steps)
+        print(json.dumps(result))
+        return 0 if result.get("type") != "error" else 1
+
     if exec_id:
         params = {}
         if params_json:
@@ -309,11 +733,15 @@ def main(argv):
         print(json.dumps(result))
         return 0 if result.get("type") != "error" else 1
 
+    if batch_source is not None:
+        backends = [b.strip() for b in (backend or "").split(",") if b.strip()] or [None]
+        return _run_plan_batch(batch_source, batch_out, thr, batch_size, workers, backends)
+
     if text is None:
-        print(json.dumps({"type": "error", "message": "Missing --plan text or --exec-id"}))
+        print(json.dumps({"type": "error", "message": "Missing --plan text, --plan-batch, --exec-id or --exec-steps"}))
         return 1
 
-    result = plan_from_text(text, thr)
+    result = plan_from_text(text, thr, backend)
     print(json.dumps(result))
     return 0 if result.get("type") != "error" else 1
 
@@ -1,10 +1,14 @@
 import json
+import math
 import os
-import urllib.request
-import urllib.error
+import zlib
 
 GEMINI_EMBED_MODEL = "models/text-embedding-004"
 GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/{GEMINI_EMBED_MODEL}:embedContent"
+GEMINI_BATCH_URL = f"https://generativelanguage.googleapis.com/v1beta/{GEMINI_EMBED_MODEL}:batchEmbedContents"
+# batchEmbedContents accepts at most 100 requests per call
+MAX_BATCH = 100
+LOCAL_EMBED_DIM = int(os.getenv("CMD_LOCAL_EMBED_DIM", "512"))
 
 
 class EmbeddingError(Exception):
@@ -18,27 +22,21 @@ def _api_key() -> str:
     return key
 
 
-def embed_text(text: str) -> list:
+def _post(url: str, body: dict) -> dict:
+    import urllib.request
+    import urllib.error
+
     key = _api_key()
-    body = {
-        "model": GEMINI_EMBED_MODEL,
-        "content": {"parts": [{"text": text}]},
-    }
     data = json.dumps(body).encode("utf-8")
     req = urllib.request.Request(
-        f"{GEMINI_URL}?key={key}",
+        f"{url}?key={key}",
         data=data,
         headers={"Content-Type": "application/json"},
         method="POST",
     )
     try:
         with urllib.request.urlopen(req, timeout=20) as resp:
-            payload = json.loads(resp.read().decode("utf-8"))
-            if "embedding" in payload and "values" in payload["embedding"]:
-                return payload["embedding"]["values"]
-            if "embeddings" in payload and payload["embeddings"]:
-                return payload["embeddings"][0]["values"]
-            raise EmbeddingError("Unexpected embedding response shape")
+            return json.loads(resp.read().decode("utf-8"))
     except urllib.error.HTTPError as e:
         try:
             detail = e.read().decode("utf-8")
@@ -49,9 +47,107 @@ def embed_text(text: str) -> list:
         raise EmbeddingError(f"Network error: {e}")
 
 
-def load_or_build_cache(commands: list, cache_path: str) -> dict:
+class GeminiBackend:
+    """Gemini text-embedding-004 over HTTPS. Needs network and an API key."""
+
+    name = "gemini"
+    match_threshold = 0.75
+    clarify_threshold = 0.60
+
+    def cache_path(self, cache_path: str) -> str:
+        # Keeps the original commands_cache.json name
+        return cache_path
+
+    def embed_text(self, text: str) -> list:
+        body = {
+            "model": GEMINI_EMBED_MODEL,
+            "content": {"parts": [{"text": text}]},
+        }
+        payload = _post(GEMINI_URL, body)
+        if "embedding" in payload and "values" in payload["embedding"]:
+            return payload["embedding"]["values"]
+        if "embeddings" in payload and payload["embeddings"]:
+            return payload["embeddings"][0]["values"]
+        raise EmbeddingError("Unexpected embedding response shape")
+
+    def embed_texts(self, texts: list) -> list:
+        """
+        Embed many texts with batchEmbedContents, MAX_BATCH texts per request.
+        Returns one vector per input text, in order.
+        """
+        out = []
+        for i in range(0, len(texts), MAX_BATCH):
+            chunk = texts[i : i + MAX_BATCH]
+            body = {
+                "requests": [
+                    {"model": GEMINI_EMBED_MODEL, "content": {"parts": [{"text": t}]}}
+                    for t in chunk
+                ]
+            }
+            payload = _post(GEMINI_BATCH_URL, body)
+            embs = payload.get("embeddings") or []
+            if len(embs) != len(chunk) or not all("values" in e for e in embs):
+                raise EmbeddingError("Unexpected batch embedding response shape")
+            out.extend(e["values"] for e in embs)
+        return out
+
+
+class LocalBackend:
+    """
+    Offline CPU embedding: word unigrams and character 3-5 grams, feature-hashed
+    with a sign bit into LOCAL_EMBED_DIM dimensions and L2-normalised.
+
+    Thresholds come from `--plan-batch eval/commands_eval.jsonl --backend
+    local`: no wrong match scored above 0.71, so anything below 0.72 goes
+    through "Did you mean"; non-commands stayed under 0.25.
+    """
+
+    name = "local"
+    match_threshold = 0.72
+    clarify_threshold = 0.40
+
+    def __init__(self, dim: int = LOCAL_EMBED_DIM):
+        self.dim = dim
+
+    def cache_path(self, cache_path: str) -> str:
+        root, ext = os.path.splitext(cache_path)
+        return f"{root}.{self.name}-{self.dim}{ext}"
+
+    def embed_text(self, text: str) -> list:
+        t = " ".join(text.lower().split())
+        feats = ["w:" + w for w in t.split()]
+        padded = f" {t} "
+        for n in (3, 4, 5):
+            feats.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+        vec = [0.0] * self.dim
+        for f in feats:
+            h = zlib.crc32(f.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = math.sqrt(sum(x * x for x in vec))
+        if norm == 0:
+            return vec
+        return [x / norm for x in vec]
+
+    def embed_texts(self, texts: list) -> list:
+        return [self.embed_text(t) for t in texts]
+
+
+BACKENDS = {"gemini": GeminiBackend, "local": LocalBackend}
+
+
+def get_backend(name: str | None = None):
+    """Backend by name, defaulting to CMD_EMBED_BACKEND (gemini when unset)."""
+    name = (name or os.getenv("CMD_EMBED_BACKEND") or "gemini").strip().lower()
+    cls = BACKENDS.get(name)
+    if cls is None:
+        raise EmbeddingError(f"Unknown embedding backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return cls()
+
+
+def load_or_build_cache(commands: list, cache_path: str, backend=None) -> dict:
     """
-    Return dict with per-command example embeddings:
+    Return dict with per-command example embeddings from `backend`. The cache
+    file is namespaced per backend (see backend.cache_path):
     {
       id: {
         "description": str,
@@ -59,6 +155,8 @@ def load_or_build_cache(commands: list, cache_path: str) -> dict:
       }
     }
     """
+    backend = backend or get_backend()
+    cache_path = backend.cache_path(cache_path)
     cache = {}
     if os.path.exists(cache_path):
         try:
@@ -81,12 +179,12 @@ def load_or_build_cache(commands: list, cache_path: str) -> dict:
         texts = [t for t in [desc] + examples if t and isinstance(t, str)]
 
         cached_map = {e.get("text"): e.get("embedding") for e in entry.get("examples", []) if isinstance(e, dict)}
+        missing = [t for t in texts if not cached_map.get(t)]
+        if missing:
+            cached_map.update(zip(missing, backend.embed_texts(missing)))
+            changed = True
         for t in texts:
-            emb = cached_map.get(t)
-            if not emb:
-                emb = embed_text(t)
-                changed = True
-            out_examples.append({"text": t, "embedding": emb})
+            out_examples.append({"text": t, "embedding": cached_map[t]})
 
         cache[cid] = {"description": desc, "examples": out_examples}
 
@@ -3,8 +3,6 @@ import json
 import os
 import sys
 import datetime
-import urllib.request
-import urllib.error
 
 USAGE_PATH = os.path.expanduser("~/.cache/assistant/gemini_usage.json")
 PRIMARY_MODEL = "gemini-2.5-flash"
@@ -40,6 +38,9 @@ def save_usage(data):
 
 
 def call_gemini(text: str, api_key: str, model: str) -> tuple[bool, str]:
+    import urllib.request
+    import urllib.error
+
     url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
     payload = {
         "systemInstruction": {
@@ -82,6 +83,11 @@ def call_gemini(text: str, api_key: str, model: str) -> tuple[bool, str]:
 
 
 def main(argv):
+    if "--profile-startup" in argv:
+        from startup import profile_startup
+
+        return profile_startup("gemini_live", [a for a in argv if a != "--profile-startup"])
+
     text = None
     force3 = False
     i = 0
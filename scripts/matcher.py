@@ -1,4 +1,5 @@
 import math
+import operator
 from typing import List, Tuple, Dict, Any
 
 
@@ -35,3 +36,45 @@ def rank_matches(query_vec: List[float], registry: list, cache: dict) -> List[Tu
             results.append((cmd, best_for_cmd, best_text))
     results.sort(key=lambda x: x[1], reverse=True)
     return results
+
+
+def _unit(v: List[float]) -> List[float]:
+    n = math.sqrt(sum(x * x for x in v)) if v else 0.0
+    if n == 0:
+        return []
+    return [x / n for x in v]
+
+
+def rank_matches_many(query_vecs: List[List[float]], registry: list, cache: dict) -> List[List[Tuple[Dict[str, Any], float, str]]]:
+    """
+    rank_matches for many queries at once. Example embeddings are normalised
+    once up front, so each query costs one dot product per example.
+    """
+    examples = []
+    for cmd in registry:
+        exs = []
+        for e in cache.get(cmd["id"], {}).get("examples", []):
+            u = _unit(e.get("embedding") or [])
+            if u:
+                exs.append((u, e.get("text", "")))
+        examples.append((cmd, exs))
+
+    out = []
+    for qvec in query_vecs:
+        q = _unit(qvec)
+        results: List[Tuple[Dict[str, Any], float, str]] = []
+        for cmd, exs in examples:
+            best_for_cmd = -1.0
+            best_text = ""
+            for u, text in exs:
+                if len(u) != len(q):
+                    continue
+                s = sum(map(operator.mul, q, u))
+                if s > best_for_cmd:
+                    best_for_cmd = s
+                    best_text = text
+            if best_for_cmd >= 0.0:
+                results.append((cmd, best_for_cmd, best_text))
+        results.sort(key=lambda x: x[1], reverse=True)
+        out.append(results)
+    return out
@@ -0,0 +1,141 @@
+import json
+import math
+import os
+import re
+import time
+
+from matcher import cosine_similarity
+
+MEMORY_PATH = os.path.expanduser(os.getenv("CMD_MEMORY_PATH", "~/.cache/assistant/resolutions.json"))
+MAX_ENTRIES = int(os.getenv("CMD_MEMORY_MAX_ENTRIES", "200"))
+HALF_LIFE_DAYS = float(os.getenv("CMD_MEMORY_HALF_LIFE_DAYS", "30"))
+# Query embeddings at least this close to a past resolution reuse its answer
+NEIGHBOUR_SIM = float(os.getenv("CMD_MEMORY_NEIGHBOUR_SIM", "0.92"))
+# Entries and priors whose decayed weight falls below this are forgotten
+MIN_WEIGHT = 0.25
+PRIOR_SCALE = 0.01
+MAX_PRIOR_BOOST = 0.03
+
+
+def normalize(text: str) -> str:
+    t = re.sub(r"[^\w\s%]", " ", text.lower())
+    return " ".join(t.split())
+
+
+def _decayed(weight: float, ts: float, now: float) -> float:
+    age_days = max(0.0, now - ts) / 86400
+    return weight * 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def _prune(mem: dict, now: float) -> dict:
+    entries = [e for e in mem.get("entries", []) if _decayed(e.get("count", 1), e.get("ts", 0), now) >= MIN_WEIGHT]
+    entries.sort(key=lambda e: _decayed(e.get("count", 1), e.get("ts", 0), now), reverse=True)
+    priors = {
+        cid: p
+        for cid, p in mem.get("priors", {}).items()
+        if _decayed(p.get("weight", 0), p.get("ts", 0), now) >= MIN_WEIGHT
+    }
+    return {"entries": entries[:MAX_ENTRIES], "priors": priors}
+
+
+def load_memory() -> dict:
+    """
+    Past clarification answers:
+    {
+      "entries": [ {"key": str, "embedding": [...], "id": str, "count": int, "ts": float}, ... ],
+      "priors": { id: {"weight": float, "ts": float} }
+    }
+    """
+    try:
+        with open(MEMORY_PATH, "r", encoding="utf-8") as f:
+            mem = json.load(f)
+    except Exception:
+        mem = {}
+    return _prune(mem, time.time())
+
+
+def save_memory(mem: dict) -> None:
+    mem = _prune(mem, time.time())
+    os.makedirs(os.path.dirname(MEMORY_PATH), exist_ok=True)
+    tmp = f"{MEMORY_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(mem, f)
+    os.replace(tmp, MEMORY_PATH)
+
+
+def _match(mem: dict, text: str, qvec: list, allowed_ids: list) -> dict | None:
+    key = normalize(text)
+    best = None
+    best_sim = NEIGHBOUR_SIM
+    for e in mem.get("entries", []):
+        if e.get("id") not in allowed_ids:
+            continue
+        if e.get("key") == key:
+            return e
+        s = cosine_similarity(qvec, e.get("embedding") or [])
+        if s >= best_sim:
+            best = e
+            best_sim = s
+    return best
+
+
+def recall(mem: dict, text: str, qvec: list, allowed_ids: list) -> str | None:
+    """
+    Return the command id the user picked for this phrasing (or a query
+    embedding within NEIGHBOUR_SIM of it) before, if it is among allowed_ids.
+    """
+    e = _match(mem, text, qvec, allowed_ids)
+    return e["id"] if e else None
+
+
+def refresh(mem: dict, text: str, qvec: list, cmd_id: str) -> None:
+    """
+    Keep the entry that recall() matched from decaying. Adds nothing: only
+    answers the user actually gave become new entries (see remember).
+    """
+    e = _match(mem, text, qvec, [cmd_id])
+    if e:
+        e["ts"] = time.time()
+        mem["changed"] = True
+
+
+def remember(mem: dict, text: str, qvec: list, cmd_id: str) -> None:
+    """Record a dialog answer and strengthen the command's prior."""
+    now = time.time()
+    key = normalize(text)
+    # Tells the caller to save_memory; _prune drops the flag
+    mem["changed"] = True
+    for e in mem.setdefault("entries", []):
+        if e.get("key") != key:
+            continue
+        if e.get("id") == cmd_id:
+            e["count"] = _decayed(e.get("count", 1), e.get("ts", now), now) + 1
+        else:
+            # Latest answer for the same phrasing wins
+            e["id"] = cmd_id
+            e["count"] = 1
+        e["ts"] = now
+        break
+    else:
+        mem["entries"].append(
+            {"key": key, "embedding": [round(x, 5) for x in qvec], "id": cmd_id, "count": 1, "ts": now}
+        )
+    p = mem.setdefault("priors", {}).get(cmd_id) or {}
+    mem["priors"][cmd_id] = {"weight": _decayed(p.get("weight", 0), p.get("ts", now), now) + 1, "ts": now}
+
+
+def apply_priors(mem: dict, ranked: list) -> list:
+    """Add a small, capped boost to commands the user has confirmed before and re-sort."""
+    priors = mem.get("priors") or {}
+    if not priors:
+        return ranked
+    now = time.time()
+    out = []
+    for cmd, score, matched in ranked:
+        p = priors.get(cmd["id"])
+        if p:
+            w = _decayed(p.get("weight", 0), p.get("ts", 0), now)
+            score += min(MAX_PRIOR_BOOST, PRIOR_SCALE * math.log1p(w))
+        out.append((cmd, score, matched))
+    out.sort(key=lambda x: x[1], reverse=True)
+    return out
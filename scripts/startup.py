@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Startup-time tooling for the assistant entry points.
+
+--profile-startup (commands.py, vad_record.py, gemini_live.py) re-runs the
+entry point under `python -X importtime` and prints the slowest imports.
+
+Run this file directly to check that a cold `commands --exec-id` stays
+within a budget:
+
+    python scripts/startup.py --budget-ms 80 --runs 7
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "80"))
+DEFAULT_RUNS = 7
+# Unknown id: loads the registry and returns an error without running anything
+CHECK_ARGS = ["--exec-id", "__startup_check__"]
+
+
+def _env() -> dict:
+    env = os.environ.copy()
+    path = env.get("PYTHONPATH")
+    env["PYTHONPATH"] = f"{SCRIPTS}:{path}" if path else str(SCRIPTS)
+    return env
+
+
+def _parse_importtime(stderr: str) -> tuple:
+    """Return ([(cumulative_us, self_us, module)], other_stderr_lines)."""
+    rows = []
+    other = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cum_us = int(parts[1])
+        except ValueError:
+            continue
+        rows.append((cum_us, self_us, parts[2].rstrip()))
+    return rows, other
+
+
+def profile_startup(module: str, args: list, top: int = 15) -> int:
+    """Re-run `python -m <module> args` with -X importtime and report to stderr."""
+    t0 = time.perf_counter()
+    p = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", module, *args],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        cwd=SCRIPTS,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    rows, other = _parse_importtime(p.stderr)
+
+    sys.stdout.write(p.stdout)
+    for line in other:
+        print(line, file=sys.stderr)
+    # Top-level entries (no leading indent) add up to the total import cost
+    total_us = sum(cum for cum, _s, name in rows if not name.startswith("  "))
+    print(f"startup: {module} {wall_ms:.1f} ms wall, {total_us / 1000:.1f} ms in imports", file=sys.stderr)
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module", file=sys.stderr)
+    for cum, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cum / 1000:>14.1f} {self_us / 1000:>8.1f}  {name.strip()}", file=sys.stderr)
+    return p.returncode
+
+
+def _time_run(cmd: list, env: dict) -> tuple:
+    """Return (wall ms, completed process)."""
+    t0 = time.perf_counter()
+    # cwd=SCRIPTS: -m also searches the current directory
+    p = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=SCRIPTS)
+    return (time.perf_counter() - t0) * 1000, p
+
+
+def _check_output(p) -> str | None:
+    """None if the run gave the expected unknown-id error, else why not."""
+    try:
+        out = json.loads(p.stdout)
+    except ValueError:
+        out = None
+    expected = f"Unknown command id: {CHECK_ARGS[1]}"
+    if p.returncode != 1 or not isinstance(out, dict) or out.get("type") != "error" or out.get("message") != expected:
+        detail = (p.stderr.strip().splitlines() or [p.stdout.strip()])[-1:]
+        return f"exit code {p.returncode}, stdout {p.stdout.strip()!r} {' '.join(detail)}"
+    return None
+
+
+def check_budget(budget_ms: float = DEFAULT_BUDGET_MS, runs: int = DEFAULT_RUNS) -> int:
+    """
+    Time `python -m commands --exec-id` as fresh processes; fail if the median
+    exceeds budget_ms or any run does not return the expected unknown-id error
+    (a module that fails to import is fast too). A bare interpreter start is
+    reported for reference.
+    """
+    env = _env()
+    cmd = [sys.executable, "-m", "commands", *CHECK_ARGS]
+    # First run writes __pycache__ so later runs use precompiled bytecode
+    results = [_time_run(cmd, env)]
+    bare = statistics.median(_time_run([sys.executable, "-c", "pass"], env)[0] for _ in range(runs))
+    timed = [_time_run(cmd, env) for _ in range(runs)]
+    for _ms, p in results + timed:
+        err = _check_output(p)
+        if err:
+            print(f"commands --exec-id startup check FAILED: unexpected result ({err})")
+            return 1
+    times = [ms for ms, _p in timed]
+    median = statistics.median(times)
+    ok = median <= budget_ms
+    print(
+        f"commands --exec-id cold start: median {median:.1f} ms, min {min(times):.1f} ms "
+        f"(bare python {bare:.1f} ms, budget {budget_ms:.0f} ms) {'OK' if ok else 'OVER BUDGET'}"
+    )
+    return 0 if ok else 1
+
+
+def main(argv):
+    budget = DEFAULT_BUDGET_MS
+    runs = DEFAULT_RUNS
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == "--budget-ms" and i + 1 < len(argv):
+            try:
+                budget = float(argv[i + 1])
+            except Exception:
+                pass
+            i += 2
+        elif a == "--runs" and i + 1 < len(argv):
+            try:
+                runs = max(1, int(argv[i + 1]))
+            except Exception:
+                pass
+            i += 2
+        else:
+            i += 1
+    return check_budget(budget, runs)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import uuid
+import wave
+import urllib.request
+import urllib.error
+
+GROQ_STT_MODEL = "whisper-large-v3-turbo"
+GROQ_STT_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+def _api_key() -> str:
+    key = os.getenv("GROQ_API_KEY")
+    if not key:
+        raise TranscriptionError("Missing GROQ_API_KEY in environment")
+    return key
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    buf = io.BytesIO()
+    wf = wave.open(buf, "wb")
+    wf.setnchannels(1)
+    wf.setsampwidth(2)
+    wf.setframerate(sample_rate)
+    wf.writeframes(pcm)
+    wf.close()
+    return buf.getvalue()
+
+
+def _multipart(fields: dict, filename: str, file_bytes: bytes) -> tuple:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n".encode("utf-8")
+        )
+    parts.append(
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: audio/wav\r\n\r\n".encode("utf-8")
+    )
+    parts.append(file_bytes)
+    parts.append(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def transcribe_pcm(pcm: bytes, sample_rate: int) -> str:
+    """
+    Transcribe raw 16-bit mono PCM with Groq Whisper. Same model as stt.sh.
+    """
+    key = _api_key()
+    body, content_type = _multipart(
+        {"model": GROQ_STT_MODEL, "response_format": "json"},
+        "segment.wav",
+        pcm_to_wav(pcm, sample_rate),
+    )
+    req = urllib.request.Request(
+        GROQ_STT_URL,
+        data=body,
+        headers={"Authorization": f"Bearer {key}", "Content-Type": content_type},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=20) as resp:
+            payload = json.loads(resp.read().decode("utf-8"))
+            if "text" not in payload:
+                raise TranscriptionError("Unexpected transcription response shape")
+            return (payload.get("text") or "").strip()
+    except urllib.error.HTTPError as e:
+        try:
+            detail = e.read().decode("utf-8")
+        except Exception:
+            detail = str(e)
+        raise TranscriptionError(f"Groq API error: {e.code} {detail}")
+    except urllib.error.URLError as e:
+        raise TranscriptionError(f"Network error: {e}")
@@ -1,21 +1,25 @@
-import webrtcvad
-import sounddevice as sd
 import collections
 import time
 import wave
-import numpy as np
 import threading
-import subprocess
 import os 
+import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+# webrtcvad and sounddevice are imported in main(), transcribe on the first
+# segment upload.
 
 
 DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+TMP_PATH = DIR_PATH.replace('/scripts', '/tmp')
+TRANSCRIPT_PATH = f"{TMP_PATH}/query.txt"
 
 SAMPLE_RATE = 16000
 FRAME_DURATION = 30
 FRAME_SIZE = int(SAMPLE_RATE * FRAME_DURATION / 1000)
 
-vad = webrtcvad.Vad(3)
+vad = None
 
 ring_buffer = collections.deque(maxlen=15)
 voiced_frames = []
@@ -26,16 +30,46 @@ silent_frames = 0
 SILENCE_FRAMES_TO_STOP = 50
 ENERGY_THRESHOLD = 80
 
+# Segment-wise STT: cut the recording at internal pauses and transcribe each
+# finished segment in the background while the user keeps talking.
+SEGMENT_STT = os.getenv("VAD_SEGMENT_STT", "1") != "0"
+PAUSE_FRAMES_TO_SPLIT = int(os.getenv("VAD_PAUSE_FRAMES", "12"))
+MIN_SEGMENT_FRAMES = int(os.getenv("VAD_MIN_SEGMENT_FRAMES", "30"))
+
+segment_start = 0
+segment_has_speech = False
+segment_jobs = []
+executor = None
+
 stop_event = threading.Event()
+# Last voiced frame, i.e. the real end of speech; stop_time is detected
+# SILENCE_FRAMES_TO_STOP frames (1.5 s) later.
+last_speech_time = None
+stop_time = None
 
 def rms(frame):
-    samples = np.frombuffer(frame, dtype=np.int16)
-    return np.mean(np.abs(samples))
+    # Mean absolute amplitude; 480 samples per frame is cheap without NumPy
+    samples = array("h", frame)
+    return sum(map(abs, samples)) / len(samples) if samples else 0.0
+
+
+def transcribe_segment(pcm):
+    from transcribe import transcribe_pcm
+
+    return transcribe_pcm(pcm, SAMPLE_RATE)
+
+
+def submit_segment(end):
+    global segment_start, segment_has_speech
+    pcm = b"".join(voiced_frames[segment_start:end])
+    segment_jobs.append((end - segment_start, executor.submit(transcribe_segment, pcm)))
+    segment_start = end
+    segment_has_speech = False
 
 
 
 def callback(indata, frames, time_info, status):
-    global triggered, silent_frames
+    global triggered, silent_frames, segment_has_speech, stop_time, last_speech_time
 
     if stop_event.is_set():
         return
@@ -56,11 +90,21 @@ def callback(indata, frames, time_info, status):
 
         if speech:
             silent_frames = 0
+            segment_has_speech = True
+            last_speech_time = time.monotonic()
         else:
             silent_frames += 1
 
         if silent_frames > SILENCE_FRAMES_TO_STOP:
+            stop_time = time.monotonic()
             stop_event.set()
+        elif (
+            SEGMENT_STT
+            and silent_frames == PAUSE_FRAMES_TO_SPLIT
+            and segment_has_speech
+            and len(voiced_frames) - segment_start >= MIN_SEGMENT_FRAMES
+        ):
+            submit_segment(len(voiced_frames))
 
 def a(indata, frames, time_info, status):
     global ENERGY_THRESHOLD
@@ -73,43 +117,98 @@ def a(indata, frames, time_info, status):
             ENERGY_THRESHOLD = t
 
 
-stream = sd.RawInputStream(
-    samplerate=SAMPLE_RATE,
-    blocksize=FRAME_SIZE,
-    dtype="int16",
-    channels=1,
-    callback=a
-)
-stream.start()
-time.sleep(3)
-stream.stop()
-stream.close()
-print(f"Set energy threshold to {ENERGY_THRESHOLD}")
-print("Listening...")
-#subprocess.run(["eww", "open", "assistant"])
-#subprocess.run(["eww", "update", "mode=listening"])
-
-stream = sd.RawInputStream(
-    samplerate=SAMPLE_RATE,
-    blocksize=FRAME_SIZE,
-    dtype="int16",
-    channels=1,
-    callback=callback
-)
-
-stream.start()
-
-stop_event.wait()
-
-stream.stop()
-stream.close()
-wf = wave.open(f"{DIR_PATH.replace('/scripts', '/tmp')}/query.wav", "wb")
-wf.setnchannels(1)
-wf.setsampwidth(2)
-wf.setframerate(SAMPLE_RATE)
-wf.writeframes(b"".join(voiced_frames))
-wf.close()
-
-print("Recording stopped")
-
-
+def collect_transcript():
+    """Submit the trailing segment and join all segment transcripts in order."""
+    if segment_has_speech or not segment_jobs:
+        submit_segment(len(voiced_frames))
+    texts = []
+    for _n, job in segment_jobs:
+        try:
+            t = job.result()
+        except Exception as e:
+            # Timeouts, resets and bad bodies too: fall back to stt.sh
+            print(f"Segment transcription failed: {e}")
+            return None
+        if t:
+            texts.append(t)
+    return " ".join(texts)
+
+
+def main(argv):
+    global vad, executor
+
+    if "--profile-startup" in argv:
+        from startup import profile_startup
+
+        return profile_startup("vad_record", [a for a in argv if a != "--profile-startup"])
+
+    import webrtcvad
+    import sounddevice as sd
+
+    vad = webrtcvad.Vad(3)
+    if SEGMENT_STT:
+        executor = ThreadPoolExecutor(max_workers=4)
+
+    if os.path.exists(TRANSCRIPT_PATH):
+        os.remove(TRANSCRIPT_PATH)
+
+    stream = sd.RawInputStream(
+        samplerate=SAMPLE_RATE,
+        blocksize=FRAME_SIZE,
+        dtype="int16",
+        channels=1,
+        callback=a
+    )
+    stream.start()
+    time.sleep(3)
+    stream.stop()
+    stream.close()
+    print(f"Set energy threshold to {ENERGY_THRESHOLD}")
+    print("Listening...")
+    #subprocess.run(["eww", "open", "assistant"])
+    #subprocess.run(["eww", "update", "mode=listening"])
+
+    stream = sd.RawInputStream(
+        samplerate=SAMPLE_RATE,
+        blocksize=FRAME_SIZE,
+        dtype="int16",
+        channels=1,
+        callback=callback
+    )
+
+    stream.start()
+
+    stop_event.wait()
+
+    stream.stop()
+    stream.close()
+    wf = wave.open(f"{TMP_PATH}/query.wav", "wb")
+    wf.setnchannels(1)
+    wf.setsampwidth(2)
+    wf.setframerate(SAMPLE_RATE)
+    wf.writeframes(b"".join(voiced_frames))
+    wf.close()
+
+    print("Recording stopped")
+
+    if SEGMENT_STT:
+        transcript = collect_transcript()
+        executor.shutdown(wait=False)
+        if transcript is not None:
+            with open(TRANSCRIPT_PATH, "w", encoding="utf-8") as f:
+                f.write(transcript)
+            total_s = len(voiced_frames) * FRAME_DURATION / 1000
+            last_s = segment_jobs[-1][0] * FRAME_DURATION / 1000
+            now = time.monotonic()
+            from_speech = now - (last_speech_time or stop_time or now)
+            from_stop = now - (stop_time or now)
+            print(
+                f"Transcribed {len(segment_jobs)} segment(s): end-of-speech to text "
+                f"{from_speech:.2f}s ({from_stop:.2f}s after silence detection; "
+                f"last segment {last_s:.1f}s of {total_s:.1f}s audio)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))